@@ -13,18 +13,224 @@ from google.oauth2 import service_account
 import json
 import base64
 from datetime import datetime
-from threading import Thread
+from threading import Thread, Lock, Event
+import atexit
+import hashlib
+import sqlite3
+from contextlib import closing
+import time
 import logging
 
+from vocabulary_index import VocabularyIndex
+
 app = Flask(__name__)
 CORS(app)
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+#append-only log of answers and passes. Events are buffered in memory and written in batches to SQLite by a background thread,
+#which also keeps the per-word and per-deck aggregates up to date so the stats endpoint never has to scan the raw events
+class AnswerEventLog:
+    def __init__(self, db_file='answer_events.db', batch_size=200, flush_interval=5.0, max_buffered=50000):
+        self.db_file = db_file
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffered = max_buffered  # cap on events kept in memory while the database can't be written
+        self.buffer = []
+        self.buffer_lock = Lock()
+        self.flush_requested = Event()
+        self.init_db()
+
+        self.writer = Thread(target=self.run_writer, daemon=True)
+        self.writer.start()
+        atexit.register(self.flush)
+
+    #short-lived connections, always used inside closing(): the sqlite3 context manager only commits, it doesn't close
+    def connect(self):
+        return sqlite3.connect(self.db_file, timeout=10)
+
+    def init_db(self):
+        """Create the event and aggregate tables if missing"""
+        try:
+            with closing(self.connect()) as conn:
+                # WAL is stored in the database file, so stats reads don't block the writer on later connections too
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.executescript('''
+                    CREATE TABLE IF NOT EXISTS answer_events (
+                        id INTEGER PRIMARY KEY,
+                        created_at TEXT NOT NULL,
+                        deck TEXT NOT NULL,
+                        word TEXT NOT NULL,
+                        direction TEXT NOT NULL,
+                        correct INTEGER NOT NULL,
+                        passed INTEGER NOT NULL,
+                        latency_ms INTEGER NOT NULL
+                    );
+                    CREATE TABLE IF NOT EXISTS word_stats (
+                        deck TEXT NOT NULL,
+                        word TEXT NOT NULL,
+                        direction TEXT NOT NULL,
+                        attempts INTEGER NOT NULL,
+                        correct INTEGER NOT NULL,
+                        wrong INTEGER NOT NULL,
+                        passes INTEGER NOT NULL,
+                        total_latency_ms INTEGER NOT NULL,
+                        error_rate REAL NOT NULL,
+                        PRIMARY KEY (deck, word, direction)
+                    );
+                    CREATE INDEX IF NOT EXISTS idx_word_stats_error_rate ON word_stats (deck, error_rate DESC);
+                    CREATE INDEX IF NOT EXISTS idx_word_stats_global_error_rate ON word_stats (error_rate DESC);
+                    CREATE TABLE IF NOT EXISTS deck_stats (
+                        deck TEXT PRIMARY KEY,
+                        attempts INTEGER NOT NULL,
+                        correct INTEGER NOT NULL,
+                        wrong INTEGER NOT NULL,
+                        passes INTEGER NOT NULL,
+                        total_latency_ms INTEGER NOT NULL,
+                        last_event_at TEXT NOT NULL
+                    );
+                ''')
+        except Exception as e:
+            logger.error(f"Error initializing answer event log: {e}")
+
+    def record(self, deck, word, direction, correct, passed, latency_ms):
+        """Queue an event; never touches the database on the caller's thread"""
+        event = (
+            datetime.now().isoformat(timespec='seconds'),
+            deck or 'unknown',
+            word,
+            direction,
+            int(bool(correct)),
+            int(bool(passed)),
+            int(latency_ms)
+        )
+        with self.buffer_lock:
+            self.buffer.append(event)
+            buffered = len(self.buffer)
+
+        if buffered >= self.batch_size:
+            self.request_flush()
+
+    def request_flush(self):
+        """Wake the writer thread without waiting for it"""
+        self.flush_requested.set()
+
+    def run_writer(self):
+        while True:
+            self.flush_requested.wait(self.flush_interval)
+            self.flush_requested.clear()
+            self.flush()
+
+    def flush(self):
+        """Write buffered events and fold them into the aggregates in a single transaction"""
+        with self.buffer_lock:
+            events, self.buffer = self.buffer, []
+
+        if not events:
+            return
+
+        try:
+            with closing(self.connect()) as conn, conn:
+                conn.executemany('''
+                    INSERT INTO answer_events (created_at, deck, word, direction, correct, passed, latency_ms)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', events)
+                conn.executemany('''
+                    INSERT INTO word_stats (deck, word, direction, attempts, correct, wrong, passes, total_latency_ms, error_rate)
+                    VALUES (?, ?, ?, 1, ?, ?, ?, ?, CAST(1 - ? AS REAL))
+                    ON CONFLICT (deck, word, direction) DO UPDATE SET
+                        attempts = attempts + 1,
+                        correct = correct + excluded.correct,
+                        wrong = wrong + excluded.wrong,
+                        passes = passes + excluded.passes,
+                        total_latency_ms = total_latency_ms + excluded.total_latency_ms,
+                        error_rate = CAST(wrong + excluded.wrong + passes + excluded.passes AS REAL) / (attempts + 1)
+                ''', [
+                    (deck, word, direction, correct, int(not correct and not passed), passed, latency_ms, correct)
+                    for _, deck, word, direction, correct, passed, latency_ms in events
+                ])
+                conn.executemany('''
+                    INSERT INTO deck_stats (deck, attempts, correct, wrong, passes, total_latency_ms, last_event_at)
+                    VALUES (?, 1, ?, ?, ?, ?, ?)
+                    ON CONFLICT (deck) DO UPDATE SET
+                        attempts = attempts + 1,
+                        correct = correct + excluded.correct,
+                        wrong = wrong + excluded.wrong,
+                        passes = passes + excluded.passes,
+                        total_latency_ms = total_latency_ms + excluded.total_latency_ms,
+                        last_event_at = excluded.last_event_at
+                ''', [
+                    (deck, correct, int(not correct and not passed), passed, latency_ms, created_at)
+                    for created_at, deck, _, _, correct, passed, latency_ms in events
+                ])
+            logger.info(f"Flushed {len(events)} answer events")
+        except Exception as e:
+            logger.error(f"Error writing answer events, keeping them for the next flush: {e}")
+            #the transaction was rolled back, so put the batch back in front of anything recorded meanwhile
+            with self.buffer_lock:
+                self.buffer = events + self.buffer
+                dropped = len(self.buffer) - self.max_buffered
+                if dropped > 0:
+                    del self.buffer[:dropped]
+                    logger.error(f"Answer event buffer full, dropped {dropped} oldest events")
+
+    #reads only the precomputed aggregates: the deck summaries plus the top words by error rate,
+    #within one deck when given, across all decks otherwise
+    def get_stats(self, deck=None, limit=20):
+        """Get per-deck summaries and the hardest words"""
+        try:
+            with closing(self.connect()) as conn:
+                conn.row_factory = sqlite3.Row
+                if deck:
+                    deck_rows = conn.execute('SELECT * FROM deck_stats WHERE deck = ?', (deck,)).fetchall()
+                    word_rows = conn.execute('''
+                        SELECT * FROM word_stats WHERE deck = ?
+                        ORDER BY error_rate DESC, attempts DESC LIMIT ?
+                    ''', (deck, limit)).fetchall()
+                else:
+                    deck_rows = conn.execute('SELECT * FROM deck_stats ORDER BY last_event_at DESC').fetchall()
+                    word_rows = conn.execute('''
+                        SELECT * FROM word_stats
+                        ORDER BY error_rate DESC, attempts DESC LIMIT ?
+                    ''', (limit,)).fetchall()
+        except Exception as e:
+            logger.error(f"Error reading answer stats: {e}")
+            return {"success": False, "message": f"Stats unavailable: {str(e)}"}
+
+        decks = []
+        for row in deck_rows:
+            decks.append({
+                "deck": row['deck'],
+                "attempts": row['attempts'],
+                "correct": row['correct'],
+                "wrong": row['wrong'],
+                "passes": row['passes'],
+                "error_rate": round((row['wrong'] + row['passes']) / row['attempts'], 3),
+                "avg_latency_ms": round(row['total_latency_ms'] / row['attempts']),
+                "last_event_at": row['last_event_at']
+            })
+
+        words = []
+        for row in word_rows:
+            words.append({
+                "deck": row['deck'],
+                "word": row['word'],
+                "direction": row['direction'],
+                "attempts": row['attempts'],
+                "correct": row['correct'],
+                "wrong": row['wrong'],
+                "passes": row['passes'],
+                "error_rate": round(row['error_rate'], 3),
+                "avg_latency_ms": round(row['total_latency_ms'] / row['attempts'])
+            })
+
+        return {"success": True, "decks": decks, "words": words}
+
 class EnglishLearningBackend:
     def __init__(self):
         self.vocabulary = []
+        self.vocabulary_index = VocabularyIndex(self.vocabulary)
         self.current_word = None
         self.current_mode = None
         self.first_language = None
@@ -37,6 +243,13 @@ class EnglishLearningBackend:
         self.max_passes = 3
         self.game_active = False
         self.solution_visible = False
+        self.deck_name = None
+        self.question_type = None
+        self.question_started_at = None
+        self.answer_logged = False
+        
+        # Answer history, written off the request path
+        self.answer_log = AnswerEventLog()
         
         # Google Cloud Text-to-Speech configuration
         self.tts_client = None
@@ -295,6 +508,8 @@ class EnglishLearningBackend:
             if len(df.columns) < 2:
                 return {"success": False, "message": "Sheet must have at least 2 columns!"}
             
+            # the sheet URL is a share link, so stats only ever see a hash of it
+            self.deck_name = f"google_sheet_{hashlib.sha256(csv_url.encode('utf-8')).hexdigest()[:12]}"
             return self.process_vocabulary_data(df)
             
         except requests.exceptions.RequestException as e:
@@ -306,7 +521,8 @@ class EnglishLearningBackend:
     def process_vocabulary_data(self, df):
         vocabulary_data = df.iloc[:, :2].dropna()
         
-        self.vocabulary = []
+        #the new list and its index are built on the side and swapped in together, so searches never see a half-loaded deck
+        vocabulary = []
         for _, row in vocabulary_data.iterrows():
             first_raw = str(row.iloc[0]).strip()
             second_raw = str(row.iloc[1]).strip()
@@ -319,7 +535,7 @@ class EnglishLearningBackend:
                 first_variants = self.parse_variants(first_raw)
                 second_variants = self.parse_variants(second_raw)
                 
-                self.vocabulary.append({
+                vocabulary.append({
                     'first_display': first_raw,
                     'second_display': second_raw,
                     'first_variants': first_variants,
@@ -328,12 +544,16 @@ class EnglishLearningBackend:
                     'second_main': second_variants[0] if second_variants else second_raw
                 })
         
+        self.vocabulary_index = VocabularyIndex(vocabulary)
+        self.vocabulary = vocabulary
+        
         count = len(self.vocabulary)
         if count > 0:
             return {
                 "success": True, 
                 "message": f"Found {count} items and saved successfully!",
-                "count": count
+                "count": count,
+                "deck": self.deck_name
             }
         else:
             return {"success": False, "message": "No valid data found"}
@@ -348,11 +568,50 @@ class EnglishLearningBackend:
             if len(df.columns) < 2:
                 return {"success": False, "message": "File must have at least 2 columns!"}
             
+            self.deck_name = filename
             return self.process_vocabulary_data(df)
             
         except Exception as e:
             return {"success": False, "message": f"Loading error: {str(e)}"}
 
+    #looks up the loaded vocabulary through the index (exact, then prefix, then fuzzy matches), one page at a time
+    def search_vocabulary(self, query, side='both', page=1, page_size=20):
+        # a single snapshot: the index and the entries its ids point to always belong to the same load
+        index = self.vocabulary_index
+        if not index.vocabulary:
+            return {"success": False, "message": "No vocabulary loaded!"}
+        
+        if side not in ('first', 'second', 'both'):
+            return {"success": False, "message": "Invalid side, use first, second or both"}
+        
+        try:
+            page = max(int(page), 1)
+            page_size = min(max(int(page_size), 1), 100)
+        except (TypeError, ValueError):
+            return {"success": False, "message": "Invalid paging parameters"}
+        
+        matches, has_more = index.search(query, side, (page - 1) * page_size, page_size)
+        
+        results = []
+        for entry_id, matched_side, match_type, matched_variant in matches:
+            word = index.vocabulary[entry_id]
+            results.append({
+                "first_display": word['first_display'],
+                "second_display": word['second_display'],
+                "matched_side": matched_side,
+                "matched_variant": matched_variant,
+                "match_type": match_type
+            })
+        
+        return {
+            "success": True,
+            "query": query,
+            "results": results,
+            "page": page,
+            "page_size": page_size,
+            "has_more": has_more
+        }
+
     def set_languages(self, first_lang, second_lang):
         self.first_language = first_lang.lower()
         self.second_language = second_lang.lower()
@@ -393,6 +652,8 @@ class EnglishLearningBackend:
         self.current_word = random.choice(self.vocabulary)
         self.questions_asked += 1
         self.solution_visible = False
+        self.question_started_at = time.monotonic()
+        self.answer_logged = False
         
         #create the text of the question based on the mode (first->second language or second->first language)
         if self.current_mode == "first_second":
@@ -401,6 +662,7 @@ class EnglishLearningBackend:
         else:
             question_text = f"Translate to first language:\n\n'{self.current_word['second_display']}'"
             question_type = "second_first"
+        self.question_type = question_type
             
         return {
             "success": True,
@@ -437,6 +699,22 @@ class EnglishLearningBackend:
         self.solution_visible = False
         return {"success": True, "solution_visible": False}
 
+    #queues an answer/pass event for the current word; latency is measured from when the question was served.
+    #Only the first outcome of a question counts (a pass or retry after a wrong answer is not logged again)
+    def log_answer_event(self, correct, passed):
+        if self.answer_logged:
+            return
+        self.answer_logged = True
+        
+        latency_ms = (time.monotonic() - self.question_started_at) * 1000 if self.question_started_at else 0
+        
+        if self.question_type == "first_second":
+            word = self.current_word['first_display']
+        else:
+            word = self.current_word['second_display']
+        
+        self.answer_log.record(self.deck_name, word, self.question_type, correct, passed, latency_ms)
+
     #cleans up user response. Gets all correct variants based on the mode
     def check_answer(self, user_answer):
         if not self.game_active or not self.current_word:
@@ -470,6 +748,8 @@ class EnglishLearningBackend:
             }
             self.solution_visible = True
         
+        self.log_answer_event(correct=result["correct"], passed=False)
+        
         return result
 
     def pass_question(self):
@@ -487,6 +767,8 @@ class EnglishLearningBackend:
             
             self.solution_visible = True
             
+            self.log_answer_event(correct=False, passed=True)
+            
             return {
                 "success": True, 
                 "message": "Question skipped",
@@ -555,6 +837,9 @@ class EnglishLearningBackend:
         
         self.game_active = False
         
+        # Ask the writer to persist this game's events without waiting for it
+        self.answer_log.request_flush()
+        
         return {
             "success": True,
             "game_active": False,
@@ -664,6 +949,21 @@ def api_get_audio():
     return jsonify(result)
 #------------------------------------------------------
 
+# FE: query string with q, side (first/second/both), page, page_size --> BE: search the loaded vocabulary
+@app.route('/api/search', methods=['GET'])
+def api_search():
+    query = request.args.get('q', '').strip()
+    
+    if not query:
+        return jsonify({"success": False, "message": "Query missing"})
+    
+    side = request.args.get('side', 'both')
+    page = request.args.get('page', 1)
+    page_size = request.args.get('page_size', 20)
+    
+    result = backend.search_vocabulary(query, side, page, page_size)
+    return jsonify(result)
+
 #return usage info
 @app.route('/api/usage_info', methods=['GET'])
 def api_usage_info():
@@ -674,6 +974,20 @@ def api_end_game():
     result = backend.end_game()
     return jsonify(result)
 
+# FE: optional query string with deck (the "deck" key returned by load_excel/load_google_sheet) and limit
+# --> BE: precomputed per-deck summaries and hardest words, for that deck or across all decks
+@app.route('/api/stats', methods=['GET'])
+def api_stats():
+    deck = request.args.get('deck', '').strip() or None
+    
+    try:
+        limit = min(max(int(request.args.get('limit', 20)), 1), 500)
+    except ValueError:
+        return jsonify({"success": False, "message": "Invalid limit"})
+    
+    result = backend.answer_log.get_stats(deck, limit)
+    return jsonify(result)
+
 #return a small summary of the current state 
 @app.route('/api/status', methods=['GET'])
 def api_status():
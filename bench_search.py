@@ -0,0 +1,122 @@
+"""Benchmark of the vocabulary index behind /api/search against a linear scan of the vocabulary.
+
+Builds a synthetic deck of English-like words (shared syllables and suffixes such as "ing" or
+"tion", so trigram lists are as skewed as in a real deck) with the same entry shape as
+process_vocabulary_data, and times exact, prefix and fuzzy lookups for one page of results.
+Reports the mean, 99th percentile and worst query of each kind, plus a few degenerate queries.
+Each index query is timed as the best of a few runs, so garbage collection and scheduler pauses
+don't show up as the worst case.
+
+Usage: python bench_search.py [entries]
+"""
+import random
+import sys
+import time
+
+from vocabulary_index import VocabularyIndex
+
+PAGE_SIZE = 20
+
+ONSETS = ['b', 'c', 'd', 'f', 'g', 'h', 'l', 'm', 'n', 'p', 'r', 's', 't', 'v', 'w',
+          'br', 'cr', 'st', 'tr', 'ch', 'sh', 'th', 'pl', 'gr', 'co', 'pre', 'con', '']
+VOWELS = ['a', 'e', 'i', 'o', 'u', 'ea', 'ou', 'ai', 'io', 'ee']
+CODAS = ['', '', 'n', 'r', 's', 't', 'l', 'nd', 'st', 'ng', 'ck']
+SUFFIXES = ['', '', '', 'ing', 'tion', 'er', 'ed', 'ly', 'ness', 'ment', 'able', 'ous']
+
+DEGENERATE_QUERIES = ['aaaaa', 'eeeeeeee', 'ing', 'tion', 'e', 'co']
+
+
+def random_word(rng):
+    syllables = rng.choice([1, 2, 2, 2, 3, 3])
+    word = ''.join(rng.choice(ONSETS) + rng.choice(VOWELS) + rng.choice(CODAS) for _ in range(syllables))
+    return word + rng.choice(SUFFIXES)
+
+
+def make_vocabulary(size, rng):
+    vocabulary = []
+    for _ in range(size):
+        first_variants = [random_word(rng) for _ in range(rng.choice([1, 1, 2]))]
+        second_variants = [random_word(rng)]
+        vocabulary.append({
+            'first_display': '/'.join(first_variants),
+            'second_display': second_variants[0],
+            'first_variants': first_variants,
+            'second_variants': second_variants,
+            'first_main': first_variants[0],
+            'second_main': second_variants[0]
+        })
+    return vocabulary
+
+
+#what a search did before the index: walk every entry and compare each variant
+def linear_search(vocabulary, query, fuzzy=False):
+    query = query.strip().lower()
+    results = []
+    for word in vocabulary:
+        for variant in word['first_variants'] + word['second_variants']:
+            key = variant.lower()
+            if fuzzy:
+                matched = VocabularyIndex.is_one_edit_away(query, key)
+            else:
+                matched = key.startswith(query)
+            if matched:
+                results.append(word)
+                break
+        if len(results) > PAGE_SIZE:
+            break
+    return results[:PAGE_SIZE]
+
+
+def time_queries(function, queries, repeat=3):
+    """Return (mean ms, 99th percentile ms, worst ms, worst query)"""
+    timings = []
+    for query in queries:
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            function(query)
+            elapsed = (time.perf_counter() - start) * 1000
+            best = elapsed if best is None else min(best, elapsed)
+        timings.append((best, query))
+    timings.sort()
+    worst_ms, worst_query = timings[-1]
+    p99_ms = timings[min(len(timings) - 1, len(timings) * 99 // 100)][0]
+    return sum(ms for ms, _ in timings) / len(timings), p99_ms, worst_ms, worst_query
+
+
+def make_typo(word, rng):
+    i = rng.randrange(len(word))
+    if rng.random() < 0.5 and i < len(word) - 1:
+        return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+    return word[:i] + rng.choice('abcdefghijklmnopqrstuvwxyz') + word[i + 1:]
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    rng = random.Random(42)
+    vocabulary = make_vocabulary(size, rng)
+
+    start = time.perf_counter()
+    index = VocabularyIndex(vocabulary)
+    print(f"Index build for {size} entries ({len(index.exact)} distinct variants): "
+          f"{(time.perf_counter() - start) * 1000:.0f} ms")
+
+    words = [rng.choice(vocabulary)['first_variants'][0] for _ in range(2000)]
+    cases = [
+        ('exact', words, False),
+        ('prefix', [word[:2] for word in words], False),
+        ('fuzzy', [make_typo(word, rng) for word in words], True),
+        ('degenerate', DEGENERATE_QUERIES, True),
+    ]
+
+    print(f"{'lookup':<12}{'mean (ms)':>10}{'p99 (ms)':>10}{'worst (ms)':>12}  {'worst query':<22}{'linear mean (ms)':>16}")
+    for name, queries, fuzzy in cases:
+        mean_ms, p99_ms, worst_ms, worst_query = time_queries(
+            lambda query: index.search(query, limit=PAGE_SIZE), queries)
+        # the linear scan is orders of magnitude slower, a handful of queries is enough
+        linear_ms, _, _, _ = time_queries(lambda query: linear_search(vocabulary, query, fuzzy), queries[:5], repeat=1)
+        print(f"{name:<12}{mean_ms:>10.3f}{p99_ms:>10.3f}{worst_ms:>12.3f}  {worst_query!r:<22}{linear_ms:>16.1f}")
+
+
+if __name__ == '__main__':
+    main()
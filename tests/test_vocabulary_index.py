@@ -0,0 +1,111 @@
+import random
+import string
+
+import pytest
+
+from vocabulary_index import VocabularyIndex
+
+
+def make_entry(first, second):
+    return {
+        'first_display': first,
+        'second_display': second,
+        'first_variants': [first],
+        'second_variants': [second],
+        'first_main': first,
+        'second_main': second
+    }
+
+
+WORDS = ['help', 'the', 'cat', 'word', 'dog', 'house', 'because', 'apple', 'horse', 'table']
+
+
+@pytest.fixture
+def index():
+    return VocabularyIndex([make_entry(word, f'it_{word}') for word in WORDS])
+
+
+#reference: full optimal string alignment distance (Levenshtein plus adjacent swaps)
+def edit_distance(a, b):
+    d = [[i + j if i * j == 0 else 0 for j in range(len(b) + 1)] for i in range(len(a) + 1)]
+    for i in range(1, len(a) + 1):
+        for j in range(1, len(b) + 1):
+            d[i][j] = min(d[i - 1][j] + 1, d[i][j - 1] + 1, d[i - 1][j - 1] + (a[i - 1] != b[j - 1]))
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                d[i][j] = min(d[i][j], d[i - 2][j - 2] + 1)
+    return d[len(a)][len(b)]
+
+
+def search_keys(index, query, **kwargs):
+    matches, _ = index.search(query, **kwargs)
+    return [(key, match_type) for _, _, match_type, key in matches]
+
+
+def test_exact_and_prefix_matches_come_first(index):
+    assert search_keys(index, 'ho') == [('horse', 'prefix'), ('house', 'prefix')]
+    assert search_keys(index, 'Dog ') == [('dog', 'exact')]
+
+
+@pytest.mark.parametrize('query, expected', [
+    # first-letter swaps
+    ('hte', 'the'),
+    ('act', 'cat'),
+    ('odg', 'dog'),
+    ('owrd', 'word'),
+    # swaps and substitutions in the middle of the word
+    ('hlep', 'help'),
+    ('teh', 'the'),
+    ('cta', 'cat'),
+    ('wrod', 'word'),
+    ('dgo', 'dog'),
+    ('dig', 'dog'),
+    ('hwlp', 'help'),
+    ('cot', 'cat'),
+    # longer words
+    ('huose', 'house'),
+    ('becuase', 'because'),
+    ('appel', 'apple'),
+])
+def test_fuzzy_matches_one_edit_typos(index, query, expected):
+    assert (expected, 'fuzzy') in search_keys(index, query)
+
+
+def test_fuzzy_ignores_distant_words(index):
+    assert search_keys(index, 'xyz') == []
+
+
+def test_fuzzy_finds_every_key_within_distance():
+    rng = random.Random(7)
+    words = {''.join(rng.choices('abcde', k=rng.randint(2, 9))) for _ in range(400)}
+    index = VocabularyIndex([make_entry(word, word) for word in words])
+
+    for _ in range(300):
+        query = ''.join(rng.choices('abcde', k=rng.randint(1, 11)))
+        expected = {key for key in index.exact if not key.startswith(query) and edit_distance(query, key) <= 1}
+        assert set(index.fuzzy_keys(query)) == expected, query
+
+
+def test_is_one_edit_away_matches_edit_distance():
+    rng = random.Random(3)
+    for _ in range(3000):
+        a = ''.join(rng.choices('abc', k=rng.randint(0, 6)))
+        b = ''.join(rng.choices('abc', k=rng.randint(0, 6)))
+        assert VocabularyIndex.is_one_edit_away(a, b) == (edit_distance(a, b) <= 1), (a, b)
+
+
+def test_paging_and_side_filter():
+    index = VocabularyIndex([make_entry(f'word{i:02d}', f'parola{i:02d}') for i in range(30)])
+
+    first_page, has_more = index.search('word', offset=0, limit=20)
+    second_page, has_more_after = index.search('word', offset=20, limit=20)
+    assert len(first_page) == 20 and has_more
+    assert len(second_page) == 10 and not has_more_after
+
+    matches, _ = index.search('parola', side='first')
+    assert matches == []
+    matches, _ = index.search('parola', side='second', limit=5)
+    assert all(side == 'second' for _, side, _, _ in matches)
+
+
+def test_empty_query_returns_nothing():
+    assert VocabularyIndex([make_entry('a', 'b')]).search('  ') == ([], False)
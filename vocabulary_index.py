@@ -0,0 +1,155 @@
+from bisect import bisect_left
+
+#lookup structures built over the loaded vocabulary: exact hash and sorted keys for prefixes, plus for typos
+#the single-letter deletions of short words and, per length, sorted keys and sorted reversed keys (suffixes).
+#An index is never modified after construction; reloading a deck builds a new one and swaps it in
+class VocabularyIndex:
+    # words up to this length also get their single-letter deletions indexed, for typos in short queries
+    SHORT_KEY_LENGTH = 6
+
+    def __init__(self, vocabulary=None):
+        self.vocabulary = vocabulary or []  # entries the stored entry_ids refer to
+        self.exact = {}                     # normalized variant -> [(entry_id, side)]
+        self.deletions = {}                 # short variant or one of its single-letter deletions -> [normalized variant]
+
+        for entry_id, word in enumerate(self.vocabulary):
+            for side in ('first', 'second'):
+                for variant in word[f'{side}_variants']:
+                    key = self.normalize(variant)
+                    if key:
+                        self.exact.setdefault(key, []).append((entry_id, side))
+
+        keys_by_length = {}
+        for key in self.exact:
+            if len(key) <= self.SHORT_KEY_LENGTH:
+                for deletion in self.make_deletions(key) | {key}:
+                    self.deletions.setdefault(deletion, []).append(key)
+            keys_by_length.setdefault(len(key), []).append(key)
+
+        self.sorted_keys = sorted(self.exact)   # for prefix lookups
+        self.sorted_keys_by_length = {length: sorted(keys) for length, keys in keys_by_length.items()}
+        self.sorted_reversed_keys_by_length = {
+            length: sorted(key[::-1] for key in keys) for length, keys in keys_by_length.items()
+        }
+
+    @staticmethod
+    def normalize(text):
+        return text.strip().lower() if isinstance(text, str) else ''
+
+    @staticmethod
+    def make_deletions(key):
+        return {key[:i] + key[i + 1:] for i in range(len(key))}
+
+    @staticmethod
+    def is_one_edit_away(a, b):
+        """True if b is a with at most one letter substituted, inserted, deleted, or two adjacent letters swapped"""
+        if abs(len(a) - len(b)) > 1:
+            return False
+
+        # skip the common prefix, then the rest must match after the single edit at position i
+        i = 0
+        shortest = min(len(a), len(b))
+        while i < shortest and a[i] == b[i]:
+            i += 1
+
+        if len(a) > len(b):
+            return a[i + 1:] == b[i:]
+        if len(a) < len(b):
+            return a[i:] == b[i + 1:]
+        return a[i + 1:] == b[i + 1:] or (a[i:i + 2] == b[i:i + 2][::-1] and a[i + 2:] == b[i + 2:])
+
+    def exact_keys(self, query):
+        if query in self.exact:
+            yield query
+
+    @staticmethod
+    def prefix_range(sorted_keys, prefix):
+        """Return (start, end) of the keys starting with prefix"""
+        if not prefix:
+            return 0, len(sorted_keys)
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        return bisect_left(sorted_keys, prefix), bisect_left(sorted_keys, upper)
+
+    def prefix_keys(self, query):
+        start, end = self.prefix_range(self.sorted_keys, query)
+        for i in range(start, end):
+            key = self.sorted_keys[i]
+            if key != query:
+                yield key
+
+    #collects the keys that may be one edit away from the query.
+    #For any split point h, the edit is either at or after position h - 1, so the key starts with query[:h-1],
+    #or at or before it, so the key ends with query[h:]. The ranges are a bisect away in the per-length lists of the
+    #3 compatible lengths, so the split with the fewest keys is chosen. Short queries have short halves that match too
+    #much; they use the deletion index instead, as two words one edit apart always have a single-letter deletion
+    #(or the word itself) in common
+    def fuzzy_candidates(self, query):
+        if len(query) < self.SHORT_KEY_LENGTH:
+            candidates = set()
+            for deletion in self.make_deletions(query) | {query}:
+                candidates.update(self.deletions.get(deletion, ()))
+            return candidates
+
+        lengths = [length for length in (len(query) - 1, len(query), len(query) + 1) if length in self.sorted_keys_by_length]
+        reversed_query = query[::-1]
+        best = None
+        for h in range(1, len(query) + 1):
+            prefix, reversed_suffix = query[:h - 1], reversed_query[:len(query) - h]
+            ranges = []
+            for length in lengths:
+                ranges.append((length, self.prefix_range(self.sorted_keys_by_length[length], prefix),
+                               self.prefix_range(self.sorted_reversed_keys_by_length[length], reversed_suffix)))
+            size = sum(prefix_end - prefix_start + suffix_end - suffix_start
+                       for _, (prefix_start, prefix_end), (suffix_start, suffix_end) in ranges)
+            if best is None or size < best[0]:
+                best = (size, ranges)
+
+        candidates = set()
+        for length, (prefix_start, prefix_end), (suffix_start, suffix_end) in best[1]:
+            candidates.update(self.sorted_keys_by_length[length][prefix_start:prefix_end])
+            candidates.update(key[::-1] for key in self.sorted_reversed_keys_by_length[length][suffix_start:suffix_end])
+        return candidates
+
+    #typo fallback: keys one edit away (an adjacent swap counts as one), in alphabetical order
+    def fuzzy_keys(self, query):
+        #each edit adds or removes at most 2 distinct letters, which cheaply rules out most candidates
+        query_letters = set(query)
+        matches = []
+        for key in self.fuzzy_candidates(query):
+            if key.startswith(query) or len(query_letters.symmetric_difference(key)) > 2:
+                continue
+            if self.is_one_edit_away(query, key):
+                matches.append(key)
+
+        yield from sorted(matches)
+
+    def search(self, query, side='both', offset=0, limit=20):
+        """Return (matches, has_more); matches are (entry_id, side, match_type, key) ordered exact, prefix, fuzzy"""
+        query = self.normalize(query)
+        if not query:
+            return [], False
+
+        sides = ('first', 'second') if side == 'both' else (side,)
+        needed = offset + limit + 1
+        seen = set()
+        matches = []
+
+        for match_type, keys in (
+            ('exact', self.exact_keys(query)),
+            ('prefix', self.prefix_keys(query)),
+            ('fuzzy', self.fuzzy_keys(query)),
+        ):
+            #fuzzy matches are only computed when nothing matched exactly or by prefix
+            if match_type == 'fuzzy' and matches:
+                break
+            for key in keys:
+                for entry_id, key_side in self.exact[key]:
+                    if key_side in sides and entry_id not in seen:
+                        seen.add(entry_id)
+                        matches.append((entry_id, key_side, match_type, key))
+                if len(matches) >= needed:
+                    break
+            if len(matches) >= needed:
+                break
+
+        return matches[offset:offset + limit], len(matches) > offset + limit